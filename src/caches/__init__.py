@@ -0,0 +1,7 @@
+"""Caches module initialization."""
+
+from .answer_cache import AnswerCache
+
+__all__ = [
+    "AnswerCache",
+]
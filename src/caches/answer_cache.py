@@ -0,0 +1,61 @@
+"""Answer cache module."""
+
+import threading
+import time
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Iterable, Optional, Tuple
+
+
+class AnswerCache:
+    """In-process LRU cache with TTL for generated answers."""
+
+    __entries: "OrderedDict[str, Tuple[float, str]]"
+    __max_entries: int
+    __ttl: float
+    __lock: threading.Lock
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.__entries = OrderedDict()
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        model_id: str, prompt: str, doc_ids: Iterable[str]
+    ) -> str:
+        """Build a cache key from the model, prompt and retrieved docs."""
+
+        raw = f"{model_id}|{prompt.strip().casefold()}|{sorted(doc_ids)}"
+
+        return blake2b(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached answer for the key, or None when missing."""
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry is None:
+                return None
+
+            expires_at, answer = entry
+
+            if time.monotonic() >= expires_at:
+                del self.__entries[key]
+                return None
+
+            self.__entries.move_to_end(key)
+
+            return answer
+
+    def put(self, key: str, answer: str) -> None:
+        """Store an answer, evicting the least recently used entries."""
+
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + self.__ttl, answer)
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
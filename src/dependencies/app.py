@@ -6,10 +6,9 @@ from typing import AsyncGenerator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from google import genai
-from pydantic import AnyHttpUrl
 from pydantic_settings import BaseSettings
 
+from src.services import ConversationService
 from src.workflows import AgentWorkFlow
 
 logging.basicConfig(
@@ -22,13 +21,14 @@ class Settings(BaseSettings):
     """Application settings."""
 
     # API
-    BACKEND_CORS_ORIGINS: list[str | AnyHttpUrl] = [
+    BACKEND_CORS_ORIGINS: list[str] = [
         "*",
     ]
 
     # VERTEX AI
     GOOGLE_API_KEY: str
     MODEL_ID: str
+    USE_LLM_CONTEXT_CHECK: bool = False
 
     # LANGCHAIN
     LANGCHAIN_TRACING_V2: bool = True
@@ -49,12 +49,20 @@ async def lifespan(app_context: FastAPI) -> AsyncGenerator[None, None]:
     Lifespan context manager for the FastAPI application.
     """
 
+    from google import genai
+
     app_context.state.genai_client = genai.Client(
         api_key=settings.GOOGLE_API_KEY,
     )
 
     app_context.state.agent_workflow = AgentWorkFlow(
-        client=app_context.state.genai_client, model_id=settings.MODEL_ID
+        client=app_context.state.genai_client,
+        model_id=settings.MODEL_ID,
+        use_llm_context_check=settings.USE_LLM_CONTEXT_CHECK,
+    )
+
+    app_context.state.conversation_service = ConversationService(
+        agent_workflow=app_context.state.agent_workflow
     )
 
     yield
@@ -67,7 +75,7 @@ app = FastAPI(
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+    allow_origins=settings.BACKEND_CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],  # in production, specify allowed methods
     allow_headers=["*"],  # in production, specify allowed headers
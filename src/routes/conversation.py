@@ -1,11 +1,10 @@
 """Conversation routes module."""
 
 from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 
 from src.dependencies import app
-from src.services import ConversationService
 
 conversation_router = APIRouter()
 
@@ -20,14 +19,16 @@ class ConversationRequest(BaseModel):
 async def conversation(request: ConversationRequest):
     """Handle conversation requests."""
 
-    return StreamingResponse(
-        content=ConversationService(
-            agent_workflow=app.state.agent_workflow
-        ).converse(request.message),
+    async def sse_stream():
+        async for chunk in app.state.conversation_service.converse(
+            request.message
+        ):
+            yield ServerSentEvent(data=chunk)
+
+    return EventSourceResponse(
+        content=sse_stream(),
         headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
             "X-Accel-Buffering": "no",
         },
-        media_type="text/event-stream",
+        ping=15,
     )
@@ -2,10 +2,28 @@
 
 import logging
 
+import orjson
+
 from src.workflows import AgentWorkFlow
 
 logger = logging.getLogger(__name__)
 
+_GREETINGS = frozenset(
+    {
+        "hi", "hello", "hey", "hi there", "hello there",
+        "good morning", "good afternoon", "good evening",
+    }
+)
+
+_GREETING_REPLY = (
+    "Hello! Ask me a question about a topic in the knowledge base "
+    "and I'll do my best to help."
+)
+
+_TOO_SHORT_REPLY = (
+    "I'm sorry, but I cannot provide an answer based on the given input."
+)
+
 
 class ConversationService:
     """Service to execute conversation logic."""
@@ -18,10 +36,25 @@ class ConversationService:
     async def converse(self, message: str):
         """Process the conversation message and return a response."""
 
+        normalized = message.strip().casefold()
+
+        if normalized in _GREETINGS:
+            yield orjson.dumps({"text": _GREETING_REPLY}).decode("utf-8")
+            return
+
+        if len(normalized) < 3:
+            yield orjson.dumps({"text": _TOO_SHORT_REPLY}).decode("utf-8")
+            return
+
+        if normalized in AgentWorkFlow.KNOWLEDGE_BASE:
+            stream = self.__agent_workflow.stream_direct(prompt=message)
+        else:
+            stream = self.__agent_workflow.stream(prompt=message)
+
         try:
-            async for chunk in self.__agent_workflow.stream(prompt=message):
-                yield f"data: {chunk}\n\n"
+            async for chunk in stream:
+                yield orjson.dumps({"text": chunk}).decode("utf-8")
 
         except Exception as e:
             logger.error(e)
-            yield "data: [ERROR]\n\n"
+            yield orjson.dumps({"text": "[ERROR]"}).decode("utf-8")
@@ -1,13 +1,73 @@
 """Workflow Agent using LangGraph and Google GenAI."""
 
-from typing import Dict, TypedDict
-
-from google import genai
-from langgraph.config import get_stream_writer
-from langgraph.graph import END, StateGraph
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, ClassVar, Dict, List, TypedDict
+
+import ahocorasick
+from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
-from langsmith import get_current_run_tree
-from langsmith.schemas import UsageMetadata
+
+from src.caches import AnswerCache
+
+if TYPE_CHECKING:
+    from google import genai
+
+_CTX_PREFIX = (
+    "Does the following input contain a clear question "
+    "or topic with enough context to answer?\n\n"
+    "Input: "
+)
+_CTX_SUFFIX = "\n\nAnswer YES or NO."
+
+_CANNOT_ANSWER = {
+    "answer": (
+        "I'm sorry, but I cannot provide an answer "
+        "based on the given input."
+    )
+}
+
+_QUESTION_WORDS = frozenset(
+    {
+        "what", "how", "why", "when", "where", "who", "which",
+        "explain", "describe", "tell", "define", "compare",
+        "summarize", "can", "could", "should", "would", "do",
+        "does", "is", "are",
+    }
+)
+
+_VERDICT_CACHE_MAX_ENTRIES = 4096
+_STREAM_FLUSH_MAX_CHARS = 64
+_STREAM_FLUSH_INTERVAL = 0.02
+_STREAM_QUEUE_MAX_SIZE = 32
+
+_KNOWLEDGE_BASE: Dict[str, str] = {
+    "langgraph": (
+        "LangGraph is a library for building stateful, "
+        "multi-actor applications with LLMs."
+    ),
+    "python": (
+        "Python is a high-level, interpreted programming "
+        "language known for readability."
+    ),
+    "gemini": (
+        "Gemini is Google's most capable AI model, "
+        "built to be natively multimodal."
+    ),
+}
+
+
+def _has_enough_context(normalized: str) -> bool:
+    """Local heuristic replacement for the LLM YES/NO context gate."""
+
+    words = normalized.split()
+
+    if len(words) < 4:
+        return False
+
+    return normalized.endswith("?") or words[0] in _QUESTION_WORDS
 
 
 class GraphState(TypedDict):
@@ -17,198 +77,347 @@ class GraphState(TypedDict):
     answer: str
     has_context: bool
     has_documents: bool
+    documents: List[str]
 
 
-class AgentWorkFlow:
-    """Agent Workflow to manage a LangGraph execution."""
+def _build_automaton(
+    knowledge_base: Dict[str, str],
+) -> ahocorasick.Automaton:
+    """Compile the knowledge base keys into an Aho-Corasick automaton."""
 
-    __client: genai.Client
-    __model_id: str
+    automaton = ahocorasick.Automaton()
 
-    def __init__(self, client: genai.Client, model_id: str):
-        self.__client = client
-        self.__model_id = model_id
-        self.__app = self.__build_graph()
+    for key, document in knowledge_base.items():
+        automaton.add_word(key, (key, document))
 
-    def __build_graph(self) -> CompiledStateGraph:
-        """Graph construction."""
+    automaton.make_automaton()
 
-        workflow = StateGraph(GraphState)
+    return automaton
 
-        workflow.add_node("check_context", self.check_context_node)
-        workflow.add_node("retrieve_rag", self.retrieve_rag_node)
-        workflow.add_node("generate_answer", self.generate_answer_node)
-        workflow.add_node("cannot_answer", self.cannot_answer_node)
 
-        workflow.add_conditional_edges(
-            "check_context",
-            self.check_context_condition,
-            {
-                "has_context": "retrieve_rag",
-                "no_context": "cannot_answer",
-            },
-        )
+_AUTOMATON = _build_automaton(_KNOWLEDGE_BASE)
 
-        workflow.add_conditional_edges(
-            "retrieve_rag",
-            self.retrieve_rag_condition,
-            {
-                "has_documents": "generate_answer",
-                "no_documents": "cannot_answer",
-            },
-        )
 
-        workflow.add_edge("generate_answer", END)
-        workflow.set_entry_point("check_context")
+def _get_ctx() -> SimpleNamespace:
+    """Reads the per-workflow runtime context from the run config."""
 
-        return workflow.compile()
+    from langgraph.config import get_config
 
-    def check_context_node(self, state: GraphState) -> Dict:
-        """Checks whether the prompt has enough context."""
+    return get_config()["configurable"]["ctx"]
 
-        prompt = (
-            "Does the following input contain a clear question "
-            "or topic with enough context to answer?\n\n"
-            f"Input: {state['prompt']}\n\n"
-            "Answer YES or NO."
-        )
 
-        response = self.__client.models.generate_content(
-            model=self.__model_id,
-            contents=prompt,
-        )
+def _usage_metadata(
+    ctx: SimpleNamespace, input_tokens: int, output_tokens: int
+) -> None:
+    """Send usage metadata to LangSmith."""
 
-        input_tokens = response.usage_metadata.prompt_token_count
-        output_tokens = response.usage_metadata.candidates_token_count
+    from langsmith import get_current_run_tree
+    from langsmith.schemas import UsageMetadata
 
-        self.__usage_metadata(input_tokens, output_tokens)
+    run = get_current_run_tree()
 
-        return {"has_context": "YES" in response.text.upper()}
+    if not run:
+        return
 
-    def retrieve_rag_node(self, state: GraphState) -> Dict:
-        """Mock RAG retrieval."""
-
-        mock_knowledge_base = {
-            "langgraph": (
-                "LangGraph is a library for building stateful, "
-                "multi-actor applications with LLMs."
-            ),
-            "python": (
-                "Python is a high-level, interpreted programming "
-                "language known for readability."
+    run.add_metadata(
+        metadata={
+            **ctx.metadata_template,
+            "usage_metadata": UsageMetadata(
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                total_tokens=input_tokens + output_tokens,
             ),
-            "gemini": (
-                "Gemini is Google's most capable AI model, "
-                "built to be natively multimodal."
-            ),
-        }
+        },
+    )
 
-        query = state["prompt"].lower()
-        documents = [v for k, v in mock_knowledge_base.items() if k in query]
 
-        return {"has_documents": bool(documents)}
+async def _check_context_node(state: GraphState) -> Dict:
+    """Checks whether the prompt has enough context."""
 
-    async def generate_answer_node(self, state: GraphState) -> Dict:
-        """Generates the final answer."""
+    ctx = _get_ctx()
+    normalized = state["prompt"].strip().casefold()
 
-        writer = get_stream_writer()
-        response_text = ""
+    if not ctx.use_llm_context_check:
+        return {"has_context": _has_enough_context(normalized)}
 
-        input_tokens = 0
-        output_tokens = 0
+    if len(normalized.split()) >= 4 and normalized.endswith("?"):
+        return {"has_context": True}
 
-        async for (
-            chunk
-        ) in await self.__client.aio.models.generate_content_stream(
-            model=self.__model_id,
-            contents=state["prompt"],
-        ):
-            if chunk.usage_metadata:
-                input_tokens = chunk.usage_metadata.prompt_token_count
-                output_tokens = chunk.usage_metadata.candidates_token_count
-
-            if chunk.text:
-                response_text += chunk.text
-                writer({"answer": chunk.text})
-
-        self.__usage_metadata(input_tokens, output_tokens)
-
-        return {"answer": response_text}
-
-    def __usage_metadata(self, input_tokens: int, output_tokens: int) -> None:
-        """Send usage metadata to LangSmith."""
-
-        run = get_current_run_tree()
-
-        if run:
-            run.add_metadata(
-                metadata={
-                    "ls_model_name": self.__model_id,
-                    "ls_model_type": "llm",
-                    "ls_provider": "google_genai",
-                    "ls_run_depth": 0,
-                    "ls_temperature": 0.7,
-                    "usage_metadata": UsageMetadata(
-                        input_tokens=input_tokens,
-                        output_tokens=output_tokens,
-                        total_tokens=input_tokens + output_tokens,
-                    ),
-                    "invocation_params": {
-                        "_type": "google_gemini",
-                        "candidate_count": 1,
-                        "image_config": None,
-                        "max_output_tokens": None,
-                        "model": self.__model_id,
-                        "stop": None,
-                        "temperature": 0.7,
-                        "top_k": None,
-                        "top_p": None,
-                    },
-                    "options": {"streaming": True, "stop": None},
-                },
-            )
+    with ctx.verdict_lock:
+        if normalized in ctx.verdict_cache:
+            return {"has_context": ctx.verdict_cache[normalized]}
+
+    prompt = _CTX_PREFIX + state["prompt"] + _CTX_SUFFIX
+
+    response = await ctx.client.aio.models.generate_content(
+        model=ctx.model_id,
+        contents=prompt,
+    )
+
+    input_tokens = response.usage_metadata.prompt_token_count
+    output_tokens = response.usage_metadata.candidates_token_count
+
+    _usage_metadata(ctx, input_tokens, output_tokens)
+
+    has_context = "YES" in response.text.upper()
+
+    with ctx.verdict_lock:
+        while len(ctx.verdict_cache) >= _VERDICT_CACHE_MAX_ENTRIES:
+            del ctx.verdict_cache[next(iter(ctx.verdict_cache))]
+
+        ctx.verdict_cache[normalized] = has_context
+
+    return {"has_context": has_context}
+
+
+def _retrieve_rag_node(state: GraphState) -> Dict:
+    """Mock RAG retrieval."""
+
+    query = state["prompt"].casefold()
+    documents = sorted({key for _, (key, _) in _AUTOMATON.iter(query)})
+
+    return {"has_documents": bool(documents), "documents": documents}
+
+
+async def _generate_answer_node(state: GraphState) -> Dict:
+    """Generates the final answer."""
+
+    from langgraph.config import get_stream_writer
+
+    ctx = _get_ctx()
+    writer = get_stream_writer()
+
+    cache_key = AnswerCache.make_key(
+        model_id=ctx.model_id,
+        prompt=state["prompt"],
+        doc_ids=state.get("documents", []),
+    )
+    cached_answer = ctx.answer_cache.get(cache_key)
+
+    if cached_answer is not None:
+        step = _STREAM_FLUSH_MAX_CHARS
+
+        for start in range(0, len(cached_answer), step):
+            writer({"answer": cached_answer[start:start + step]})
+
+        return {"answer": cached_answer}
+
+    parts: List[str] = []
+
+    input_tokens = 0
+    output_tokens = 0
+
+    queue: "asyncio.Queue[str | None]" = asyncio.Queue(
+        maxsize=_STREAM_QUEUE_MAX_SIZE
+    )
+
+    async def producer() -> None:
+        """Reads the Gemini stream into the bounded queue."""
+
+        nonlocal input_tokens, output_tokens
+
+        try:
+            async for (
+                chunk
+            ) in await ctx.client.aio.models.generate_content_stream(
+                model=ctx.model_id,
+                contents=state["prompt"],
+            ):
+                if chunk.usage_metadata:
+                    input_tokens = chunk.usage_metadata.prompt_token_count
+                    output_tokens = (
+                        chunk.usage_metadata.candidates_token_count
+                    )
+
+                if chunk.text:
+                    await queue.put(chunk.text)
+        finally:
+            await queue.put(None)
+
+    async def consumer() -> None:
+        """Drains the queue into coalesced writer frames."""
 
-    def cannot_answer_node(self, _: GraphState) -> Dict:
-        """Fallback node when the question cannot be answered."""
+        buffer: List[str] = []
+        buffered_chars = 0
+        last_flush = time.monotonic()
 
-        return {
-            "answer": (
-                "I'm sorry, but I cannot provide an answer "
-                "based on the given input."
-            )
-        }
+        while (piece := await queue.get()) is not None:
+            parts.append(piece)
+            buffer.append(piece)
+            buffered_chars += len(piece)
 
-    def check_context_condition(self, state: GraphState) -> str:
-        """Determines the condition based on context check."""
+            now = time.monotonic()
 
-        return "has_context" if state["has_context"] else "no_context"
+            if (
+                buffered_chars >= _STREAM_FLUSH_MAX_CHARS
+                or now - last_flush > _STREAM_FLUSH_INTERVAL
+            ):
+                writer({"answer": "".join(buffer)})
+                buffer.clear()
+                buffered_chars = 0
+                last_flush = now
 
-    def retrieve_rag_condition(self, state: GraphState) -> str:
-        """Determines the condition based on RAG retrieval."""
+        if buffer:
+            writer({"answer": "".join(buffer)})
 
-        return "has_documents" if state["has_documents"] else "no_documents"
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(producer())
+        tg.create_task(consumer())
+
+    _usage_metadata(ctx, input_tokens, output_tokens)
+
+    response_text = "".join(parts)
+    ctx.answer_cache.put(cache_key, response_text)
+
+    return {"answer": response_text}
+
+
+def _cannot_answer_node(_: GraphState) -> Dict:
+    """Fallback node when the question cannot be answered."""
+
+    from langgraph.config import get_stream_writer
+
+    writer = get_stream_writer()
+    writer(_CANNOT_ANSWER)
+
+    return _CANNOT_ANSWER
+
+
+def _gate_node(_: GraphState) -> Dict:
+    """Joins the parallel context check and RAG retrieval branches."""
+
+    return {}
+
+
+def _gate_condition(state: GraphState) -> str:
+    """Determines the condition based on the merged branch results."""
+
+    if state["has_context"] and state["has_documents"]:
+        return "can_answer"
+
+    return "cannot_answer"
+
+
+def _build_graph() -> CompiledStateGraph:
+    """Graph construction."""
+
+    workflow = StateGraph(GraphState)
+
+    workflow.add_node("check_context", _check_context_node)
+    workflow.add_node("retrieve_rag", _retrieve_rag_node)
+    workflow.add_node("gate", _gate_node)
+    workflow.add_node("generate_answer", _generate_answer_node)
+    workflow.add_node("cannot_answer", _cannot_answer_node)
+
+    workflow.add_edge(START, "check_context")
+    workflow.add_edge(START, "retrieve_rag")
+
+    workflow.add_edge("check_context", "gate")
+    workflow.add_edge("retrieve_rag", "gate")
+
+    workflow.add_conditional_edges(
+        "gate",
+        _gate_condition,
+        {
+            "can_answer": "generate_answer",
+            "cannot_answer": "cannot_answer",
+        },
+    )
+
+    workflow.add_edge("generate_answer", END)
+
+    return workflow.compile()
+
+
+def _build_direct_graph() -> CompiledStateGraph:
+    """Single-node graph that skips the context and retrieval gates."""
+
+    workflow = StateGraph(GraphState)
+
+    workflow.add_node("generate_answer", _generate_answer_node)
+
+    workflow.add_edge(START, "generate_answer")
+    workflow.add_edge("generate_answer", END)
+
+    return workflow.compile()
+
+
+_COMPILED_GRAPH = _build_graph()
+_COMPILED_DIRECT_GRAPH = _build_direct_graph()
+
+
+class AgentWorkFlow:
+    """Agent Workflow to manage a LangGraph execution.
+
+    The graph topology is compiled once at module import; each instance
+    only carries the runtime context (client, model, caches) that is
+    injected into the shared compiled graph via the run config.
+    """
+
+    KNOWLEDGE_BASE: ClassVar[Dict[str, str]] = _KNOWLEDGE_BASE
+    AUTOMATON: ClassVar[ahocorasick.Automaton] = _AUTOMATON
+
+    __ctx: SimpleNamespace
+
+    def __init__(
+        self,
+        client: "genai.Client",
+        model_id: str,
+        use_llm_context_check: bool = False,
+    ):
+        self.__ctx = SimpleNamespace(
+            client=client,
+            model_id=model_id,
+            use_llm_context_check=use_llm_context_check,
+            answer_cache=AnswerCache(),
+            verdict_cache={},
+            verdict_lock=threading.Lock(),
+            metadata_template={
+                "ls_model_name": model_id,
+                "ls_model_type": "llm",
+                "ls_provider": "google_genai",
+                "ls_run_depth": 0,
+                "ls_temperature": 0.7,
+                "invocation_params": {
+                    "_type": "google_gemini",
+                    "candidate_count": 1,
+                    "image_config": None,
+                    "max_output_tokens": None,
+                    "model": model_id,
+                    "stop": None,
+                    "temperature": 0.7,
+                    "top_k": None,
+                    "top_p": None,
+                },
+                "options": {"streaming": True, "stop": None},
+            },
+        )
 
     async def stream(self, prompt: str):
         """Streams workflow execution output."""
 
-        async for stream_mode, chunk in self.__app.astream(
+        async for chunk in _COMPILED_GRAPH.astream(
+            input={"prompt": prompt},
+            config={"configurable": {"ctx": self.__ctx}},
+            stream_mode="custom",
+        ):
+            if chunk.get("answer"):
+                yield chunk["answer"]
+
+    async def stream_direct(self, prompt: str):
+        """Streams the answer node directly, skipping the gating nodes."""
+
+        async for chunk in _COMPILED_DIRECT_GRAPH.astream(
             input={"prompt": prompt},
-            stream_mode=[
-                "values",
-                "updates",
-                "custom",
-                "messages",
-                "checkpoints",
-                "tasks",
-            ],
+            config={"configurable": {"ctx": self.__ctx}},
+            stream_mode="custom",
         ):
-            if stream_mode in ["custom", "values"]:
-                if chunk.get("answer"):
-                    yield chunk["answer"]
+            if chunk.get("answer"):
+                yield chunk["answer"]
 
     def save_graph(self, path: str = "graph.png") -> None:
         """Saves the workflow graph as a Mermaid PNG."""
 
-        png = self.__app.get_graph().draw_mermaid_png()
+        png = _COMPILED_GRAPH.get_graph().draw_mermaid_png()
         with open(path, "wb") as f:
             f.write(png)